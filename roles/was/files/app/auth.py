@@ -1,18 +1,50 @@
 from typing import Optional
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import RedirectResponse
 import secrets
 from datetime import datetime, timedelta
+from urllib.parse import urlencode
 from sqlalchemy import text
 
-from config import *
-from db import AsyncSessionLocal, redis_client
+from config import settings
+from db import get_engine, get_redis
 from utils import state_key, login_session_key, safe_redirect
-from google import exchange_token, fetch_userinfo
+from google import GOOGLE_AUTH_URL, exchange_token, fetch_userinfo
 from security import create_jwt
 
 router = APIRouter(tags=["auth"])
 
+# 요청마다 바뀌는 건 state 뿐 → 나머지 쿼리스트링은 import 시 한 번만 인코딩
+_AUTH_URL_PREFIX = GOOGLE_AUTH_URL + "?" + urlencode({
+    "client_id": settings.google_client_id,
+    "response_type": "code",
+    "scope": "openid email profile",
+    "redirect_uri": settings.google_redirect_uri,
+    "access_type": "offline",
+    "prompt": "select_account",
+}) + "&state="
+
+# SQL은 import 시 한 번만 파싱
+_UPSERT_USER = text("""
+    INSERT INTO oauth_users (user_id, google_id, email, created_at)
+    VALUES (:uid, :gid, :email, now())
+    ON CONFLICT (google_id)
+    DO UPDATE SET
+        email = EXCLUDED.email,
+        updated_at = now()
+    RETURNING user_id
+""")
+
+_UPSERT_TOKEN = text("""
+    INSERT INTO oauth_tokens (user_id, access_token, refresh_token, expires_at)
+    VALUES (:uid, :access, :refresh, :expires)
+    ON CONFLICT (user_id)
+    DO UPDATE SET
+        access_token = EXCLUDED.access_token,
+        expires_at = EXCLUDED.expires_at,
+        refresh_token = COALESCE(EXCLUDED.refresh_token, oauth_tokens.refresh_token)
+""")
+
 
 # ======================================================
 # 1. Google Login
@@ -20,23 +52,11 @@ router = APIRouter(tags=["auth"])
 @router.get("/google/login")
 async def google_login():
     state = secrets.token_urlsafe(16)
-    redis_client.setex(state_key(state), STATE_TTL_SECONDS, "1")
-
-    params = {
-        "client_id": GOOGLE_CLIENT_ID,
-        "response_type": "code",
-        "scope": "openid email profile",
-        "redirect_uri": GOOGLE_REDIRECT_URI,
-        "state": state,
-        "access_type": "offline",
-        "prompt": "select_account",
-    }
+    r = get_redis()
+    await r.setex(state_key(state), settings.state_ttl_seconds, "1")
 
-    from urllib.parse import urlencode
-    return RedirectResponse(
-        f"https://accounts.google.com/o/oauth2/v2/auth?{urlencode(params)}",
-        status_code=302,
-    )
+    # token_urlsafe 결과는 이미 URL-safe 이므로 추가 인코딩 불필요
+    return RedirectResponse(_AUTH_URL_PREFIX + state, status_code=302)
 
 
 # ======================================================
@@ -49,31 +69,30 @@ async def google_callback(
 ):
     if not code or not state:
         return RedirectResponse(
-            safe_redirect(FRONTEND_ERROR_URL, {"reason": "missing_param"})
+            safe_redirect(settings.frontend_error_url, {"reason": "missing_param"})
         )
 
-    # state 검증
-    sk = state_key(state)
-    if not redis_client.exists(sk):
+    # state 검증 (DEL 반환값 = 삭제된 키 수 → 검증과 1회용 소비를 한 번에)
+    r = get_redis()
+    if not await r.delete(state_key(state)):
         return RedirectResponse(
-            safe_redirect(FRONTEND_ERROR_URL, {"reason": "invalid_state"})
+            safe_redirect(settings.frontend_error_url, {"reason": "invalid_state"})
         )
-    redis_client.delete(sk)
 
     # ---- Google Token Exchange ----
     try:
         token_data = await exchange_token(
             {
-                "client_id": GOOGLE_CLIENT_ID,
-                "client_secret": GOOGLE_CLIENT_SECRET,
+                "client_id": settings.google_client_id,
+                "client_secret": settings.google_client_secret,
                 "code": code,
                 "grant_type": "authorization_code",
-                "redirect_uri": GOOGLE_REDIRECT_URI,
+                "redirect_uri": settings.google_redirect_uri,
             }
         )
     except Exception:
         return RedirectResponse(
-            safe_redirect(FRONTEND_ERROR_URL, {"reason": "token_fail"})
+            safe_redirect(settings.frontend_error_url, {"reason": "token_fail"})
         )
 
     access_token = token_data.get("access_token")
@@ -83,7 +102,7 @@ async def google_callback(
 
     if not access_token:
         return RedirectResponse(
-            safe_redirect(FRONTEND_ERROR_URL, {"reason": "no_access_token"})
+            safe_redirect(settings.frontend_error_url, {"reason": "no_access_token"})
         )
 
     # ---- Userinfo ----
@@ -91,7 +110,7 @@ async def google_callback(
         userinfo = await fetch_userinfo(access_token)
     except Exception:
         return RedirectResponse(
-            safe_redirect(FRONTEND_ERROR_URL, {"reason": "userinfo_fail"})
+            safe_redirect(settings.frontend_error_url, {"reason": "userinfo_fail"})
         )
 
     google_id = userinfo.get("id")
@@ -99,39 +118,20 @@ async def google_callback(
 
     if not google_id or not email:
         return RedirectResponse(
-            safe_redirect(FRONTEND_ERROR_URL, {"reason": "no_user"})
+            safe_redirect(settings.frontend_error_url, {"reason": "no_user"})
         )
 
-    # ---- DB 처리 ----
-    async with AsyncSessionLocal() as db:
-        res = await db.execute(
-            text("SELECT user_id FROM oauth_users WHERE google_id = :gid"),
-            {"gid": google_id},
+    # ---- DB 처리 (트랜잭션은 블록 종료 시 commit) ----
+    async with get_engine().begin() as conn:
+        # 조회 + 신규 생성을 upsert 한 번으로 (기존 유저는 user_id 유지)
+        res = await conn.execute(
+            _UPSERT_USER,
+            {"uid": secrets.token_hex(16), "gid": google_id, "email": email},
         )
-        row = res.first()
-
-        if row:
-            user_id = row[0]
-        else:
-            user_id = secrets.token_hex(16)
-            await db.execute(
-                text("""
-                    INSERT INTO oauth_users (user_id, google_id, email, created_at)
-                    VALUES (:uid, :gid, :email, now())
-                """),
-                {"uid": user_id, "gid": google_id, "email": email},
-            )
-
-        await db.execute(
-            text("""
-                INSERT INTO oauth_tokens (user_id, access_token, refresh_token, expires_at)
-                VALUES (:uid, :access, :refresh, :expires)
-                ON CONFLICT (user_id)
-                DO UPDATE SET
-                    access_token = EXCLUDED.access_token,
-                    expires_at = EXCLUDED.expires_at,
-                    refresh_token = COALESCE(EXCLUDED.refresh_token, oauth_tokens.refresh_token)
-            """),
+        user_id = res.scalar_one()
+
+        await conn.execute(
+            _UPSERT_TOKEN,
             {
                 "uid": user_id,
                 "access": access_token,
@@ -140,16 +140,14 @@ async def google_callback(
             },
         )
 
-        await db.commit()
-
     # ---- JWT 발급 ----
     jwt_token = create_jwt(user_id=user_id, email=email)
 
     sid = secrets.token_urlsafe(16)
-    redis_client.setex(login_session_key(sid), LOGIN_SESSION_TTL_SECONDS, jwt_token)
+    await r.setex(login_session_key(sid), settings.login_session_ttl_seconds, jwt_token)
 
     return RedirectResponse(
-        safe_redirect(FRONTEND_SUCCESS_URL, {"sid": sid})
+        safe_redirect(settings.frontend_success_url, {"sid": sid})
     )
 
 # ======================================================
@@ -157,12 +155,13 @@ async def google_callback(
 # ======================================================
 @router.get("/session")
 async def get_login_session(sid: str):
-    token = redis_client.get(login_session_key(sid))
+    r = get_redis()
+    token = await r.get(login_session_key(sid))
     if not token:
         raise HTTPException(status_code=401, detail="Session expired")
 
     # 1회용이므로 사용 후 삭제
-    redis_client.delete(login_session_key(sid))
+    await r.delete(login_session_key(sid))
 
     return {
         "access_token": token,
@@ -1,31 +1,80 @@
 import os
+from dataclasses import dataclass
+from typing import Optional
 
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
-GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
 
-JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change-me")
-JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "60"))
+# =========================
+# 환경 변수는 import 시점에 한 번만 읽는다
+# =========================
+@dataclass(frozen=True)
+class Settings:
+    google_client_id: Optional[str]
+    google_client_secret: Optional[str]
+    google_redirect_uri: Optional[str]
 
-REDIS_HOST = os.getenv("REDIS_HOST", "10.1.1.5")
-REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
-REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+    jwt_secret_key: str
+    jwt_algorithm: str
+    jwt_expire_minutes: int
 
-STATE_TTL_SECONDS = int(os.getenv("STATE_TTL_SECONDS", "300"))
-LOGIN_SESSION_TTL_SECONDS = int(os.getenv("LOGIN_SESSION_TTL_SECONDS", "120"))
+    redis_host: str
+    redis_port: int
+    redis_db: int
+    redis_password: Optional[str]
 
-FRONTEND_SUCCESS_URL = os.getenv(
-    "FRONTEND_SUCCESS_URL", "http://justic.store:8000/login/success"
-)
-FRONTEND_ERROR_URL = os.getenv(
-    "FRONTEND_ERROR_URL", "http://justic.store:8000/login/error"
-)
+    state_ttl_seconds: int
+    login_session_ttl_seconds: int
+    task_ttl_seconds: int
 
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
+    stream_chunk_size: int
 
-DB_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    frontend_success_url: str
+    frontend_error_url: str
+
+    db_user: Optional[str]
+    db_password: Optional[str]
+    db_host: Optional[str]
+    db_port: Optional[str]
+    db_name: Optional[str]
+
+    kie_api_key: Optional[str]
+
+    @property
+    def db_url(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.db_user}:{self.db_password}"
+            f"@{self.db_host}:{self.db_port}/{self.db_name}"
+        )
+
+
+def load_settings() -> Settings:
+    return Settings(
+        google_client_id=os.getenv("GOOGLE_CLIENT_ID"),
+        google_client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
+        google_redirect_uri=os.getenv("GOOGLE_REDIRECT_URI"),
+        jwt_secret_key=os.getenv("JWT_SECRET_KEY", "change-me"),
+        jwt_algorithm=os.getenv("JWT_ALGORITHM", "HS256"),
+        jwt_expire_minutes=int(os.getenv("JWT_EXPIRE_MINUTES", "60")),
+        redis_host=os.getenv("REDIS_HOST", "10.1.1.5"),
+        redis_port=int(os.getenv("REDIS_PORT", "6379")),
+        redis_db=int(os.getenv("REDIS_DB", "0")),
+        redis_password=os.getenv("REDIS_PASSWORD"),
+        state_ttl_seconds=int(os.getenv("STATE_TTL_SECONDS", "300")),
+        login_session_ttl_seconds=int(os.getenv("LOGIN_SESSION_TTL_SECONDS", "120")),
+        task_ttl_seconds=int(os.getenv("TASK_TTL_SECONDS", "86400")),
+        stream_chunk_size=int(os.getenv("STREAM_CHUNK", str(1024 * 1024))),
+        frontend_success_url=os.getenv(
+            "FRONTEND_SUCCESS_URL", "http://justic.store:8000/login/success"
+        ),
+        frontend_error_url=os.getenv(
+            "FRONTEND_ERROR_URL", "http://justic.store:8000/login/error"
+        ),
+        db_user=os.getenv("DB_USER"),
+        db_password=os.getenv("DB_PASSWORD"),
+        db_host=os.getenv("DB_HOST"),
+        db_port=os.getenv("DB_PORT"),
+        db_name=os.getenv("DB_NAME"),
+        kie_api_key=os.getenv("KIE_API_KEY"),
+    )
+
+
+settings = load_settings()
@@ -1,25 +1,45 @@
-import redis
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from config import DB_URL, REDIS_HOST, REDIS_PORT, REDIS_DB
+from functools import lru_cache
 
-engine = create_async_engine(
-    DB_URL,
-    echo=False,
-    pool_pre_ping=True,
-    pool_recycle=1800,
-)
+import redis.asyncio as aioredis
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from config import settings
 
-AsyncSessionLocal = sessionmaker(
-    engine, expire_on_commit=False, class_=AsyncSession
-)
 
-redis_client = redis.Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    db=REDIS_DB,
-    decode_responses=True,
-    socket_connect_timeout=2,
-    socket_timeout=2,
-    retry_on_timeout=True,
-)
+# =========================
+# 지연 초기화 (첫 사용 시점에 생성, 워커 기동 시 네트워크 I/O 없음)
+# =========================
+@lru_cache(maxsize=1)
+def get_engine() -> AsyncEngine:
+    return create_async_engine(
+        settings.db_url,
+        echo=False,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_size=10,
+        max_overflow=10,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> aioredis.Redis:
+    # 모든 요청이 공유하는 커넥션 풀 (이벤트 루프를 막지 않는 asyncio 클라이언트)
+    pool = aioredis.ConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        password=settings.redis_password,
+        max_connections=32,
+        decode_responses=True,
+        socket_connect_timeout=2,
+        socket_timeout=2,
+        retry_on_timeout=True,
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
+async def close_clients() -> None:
+    # 한 번도 초기화되지 않은 클라이언트는 건드리지 않는다
+    if get_redis.cache_info().currsize:
+        await get_redis().connection_pool.disconnect()
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
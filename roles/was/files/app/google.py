@@ -1,6 +1,9 @@
 # app/google.py
-import httpx
+import orjson
 
+from http_client import get_http
+
+GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
 GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
 
@@ -10,24 +13,24 @@ async def exchange_token(data: dict) -> dict:
     Google OAuth token exchange
     return: token response json
     """
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        resp = await client.post(
-            GOOGLE_TOKEN_URL,
-            data=data,
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = await get_http().post(
+        GOOGLE_TOKEN_URL,
+        data=data,
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=8.0,
+    )
+    resp.raise_for_status()
+    return orjson.loads(resp.content)
 
 
 async def fetch_userinfo(access_token: str) -> dict:
     """
     Google userinfo fetch
     """
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        resp = await client.get(
-            GOOGLE_USERINFO_URL,
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = await get_http().get(
+        GOOGLE_USERINFO_URL,
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=8.0,
+    )
+    resp.raise_for_status()
+    return orjson.loads(resp.content)
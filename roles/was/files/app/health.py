@@ -1,12 +1,14 @@
 from fastapi import APIRouter
 from sqlalchemy import text
-from db import engine, redis_client
+from db import get_engine, get_redis
 
 router = APIRouter()
 
+_PING = text("SELECT 1")
+
 @router.get("/health")
 async def health():
-    async with engine.begin() as conn:
-        await conn.execute(text("SELECT 1"))
-    redis_client.ping()
+    async with get_engine().begin() as conn:
+        await conn.execute(_PING)
+    await get_redis().ping()
     return {"status": "ok"}
@@ -0,0 +1,27 @@
+# app/http_client.py
+from functools import lru_cache
+
+import httpx
+
+
+# =========================
+# 워커 전체가 공유하는 HTTP 클라이언트 (커넥션 / TLS 세션 재사용)
+# =========================
+@lru_cache(maxsize=1)
+def get_http() -> httpx.AsyncClient:
+    # HTTP/2: 같은 호스트(Google token/userinfo, KIE)로의 연속 요청을 한 커넥션에 다중화
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(60.0, connect=3.0),
+        limits=httpx.Limits(
+            max_keepalive_connections=64,
+            max_connections=128,
+            keepalive_expiry=60.0,
+        ),
+        headers={"User-Agent": "justic-was/3.5"},
+    )
+
+
+async def close_http() -> None:
+    if get_http.cache_info().currsize:
+        await get_http().aclose()
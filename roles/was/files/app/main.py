@@ -1,13 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from auth import router as auth_router
 from video import router as video_router
 from health import router as health_router
+from db import close_clients
+from http_client import close_http
+
+
+# =========================
+# Lifespan: 클라이언트는 첫 사용 시 생성, 종료 시 Redis / DB / HTTP 커넥션 풀 정리
+# =========================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_clients()
+    await close_http()
+
 
 app = FastAPI(
     title="Justic API Server",
     version="3.5",
+    lifespan=lifespan,
 )
 
 # =========================
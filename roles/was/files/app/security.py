@@ -2,17 +2,21 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
-from config import JWT_SECRET_KEY, JWT_ALGORITHM
+from config import settings
 
 security = HTTPBearer()
 
+# 서명 키 / 허용 알고리즘은 import 시 한 번만 준비
+_SIGNING_KEY = settings.jwt_secret_key.encode()
+_ALGORITHMS = [settings.jwt_algorithm]
+
 
 def create_jwt(user_id: str, email: str) -> str:
     payload = {
         "sub": user_id,
         "email": email,
     }
-    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    return jwt.encode(payload, _SIGNING_KEY, algorithm=settings.jwt_algorithm)
 
 
 def verify_jwt(
@@ -22,8 +26,8 @@ def verify_jwt(
     try:
         payload = jwt.decode(
             token,
-            JWT_SECRET_KEY,
-            algorithms=[JWT_ALGORITHM],
+            _SIGNING_KEY,
+            algorithms=_ALGORITHMS,
         )
         return payload
     except jwt.ExpiredSignatureError:
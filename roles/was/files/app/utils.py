@@ -1,10 +1,22 @@
 from urllib.parse import urlencode
 
+# Redis 키 prefix (단일 치환은 f-string보다 + 연결이 저렴)
+_STATE_PREFIX = "oauth:state:"
+_LOGIN_SESSION_PREFIX = "oauth:login_session:"
+_TASK_PREFIX = "video:task:"
+_VIDEO_LIST_PREFIX = "video:list:"
+
 def state_key(state: str) -> str:
-    return f"oauth:state:{state}"
+    return _STATE_PREFIX + state
 
 def login_session_key(sid: str) -> str:
-    return f"oauth:login_session:{sid}"
+    return _LOGIN_SESSION_PREFIX + sid
+
+def task_key(task_id: str) -> str:
+    return _TASK_PREFIX + task_id
+
+def video_list_key(user_id: str) -> str:
+    return _VIDEO_LIST_PREFIX + user_id
 
 def safe_redirect(url: str, params: dict) -> str:
     return f"{url}?{urlencode(params)}"
@@ -1,12 +1,24 @@
 # app/video.py
+import asyncio
 import os
-import httpx
-import subprocess
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from functools import lru_cache
+import aiofiles
+import aiofiles.os as aos
+import av
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
 
+from config import settings
+from db import get_redis
+from http_client import get_http
 from security import verify_jwt
+from utils import task_key, video_list_key
 
 router = APIRouter(tags=["video"])
 
@@ -14,10 +26,26 @@ router = APIRouter(tags=["video"])
 # External API
 # =============================
 KIE_API_URL = "https://api.kie.ai/api/v1/veo/generate"
-KIE_API_KEY = os.getenv("KIE_API_KEY")
+# 워커당 KIE 동시 호출 수 상한 (burst 시 커넥션 풀 고갈 / 업스트림 rate limit 방지)
+KIE_CONCURRENCY = 8
+
+
+@lru_cache(maxsize=1)
+def kie_headers() -> dict:
+    # 키 검증은 첫 호출 시점에 (import 시 워커 기동을 막지 않도록)
+    if not settings.kie_api_key:
+        raise RuntimeError("KIE_API_KEY is not set")
+    return {
+        "Authorization": f"Bearer {settings.kie_api_key}",
+        "Content-Type": "application/json",
+    }
+
+
+@lru_cache(maxsize=1)
+def kie_semaphore() -> asyncio.Semaphore:
+    # 이벤트 루프가 뜬 뒤 첫 요청에서 생성
+    return asyncio.Semaphore(KIE_CONCURRENCY)
 
-if not KIE_API_KEY:
-    raise RuntimeError("KIE_API_KEY is not set")
 
 # =============================
 # Storage Path
@@ -25,11 +53,119 @@ if not KIE_API_KEY:
 BASE_DIR = "/var/lib/veo"
 VIDEO_BASE = f"{BASE_DIR}/videos"
 THUMB_BASE = f"{BASE_DIR}/thumbs"
+# 다운로드 임시 경로 — 영상과 같은 파일시스템이어야 os.replace가 원자적으로 동작
+TMP_DIR = f"{BASE_DIR}/tmp"
+
+
+# 저장 경로 규칙은 여기서만 정의 (콜백 / 목록 / 스트리밍 / 썸네일 공용)
+def user_video_dir(user_id: str) -> str:
+    return f"{VIDEO_BASE}/{user_id}"
+
+
+def user_thumb_dir(user_id: str) -> str:
+    return f"{THUMB_BASE}/{user_id}"
+
+
+def video_file(user_id: str, task_id: str) -> str:
+    return f"{VIDEO_BASE}/{user_id}/{task_id}.mp4"
+
+
+def thumb_file(user_id: str, task_id: str) -> str:
+    return f"{THUMB_BASE}/{user_id}/{task_id}.jpg"
+
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# 이 크기 이상이면 다운로드 전에 디스크 블록을 미리 할당 (단편화 / 할당 syscall 감소)
+PREALLOCATE_MIN_BYTES = 4 * 1024 * 1024
+THUMB_OFFSET_SECONDS = 1
+# 디코딩은 CPU 작업 → 전용 풀로 동시 실행 수를 제한 (공용 threadpool 고갈 방지)
+THUMB_WORKERS = 2
+
+# 영상 목록 캐시 TTL (Redis 공유 캐시 → 어느 워커에서 무효화해도 전체 반영)
+LIST_CACHE_TTL_SECONDS = 5
 
 # =============================
-# In-memory task store
+# 영상 스트리밍 응답 (chunk 크기 = 청크당 await / 읽기 syscall 횟수)
+# Starlette 기본값 64KB → STREAM_CHUNK (기본 1MB)
 # =============================
-TASKS = {}
+class VideoFileResponse(FileResponse):
+    chunk_size = settings.stream_chunk_size
+
+
+# 사용자별 영상이므로 브라우저 캐시만 허용
+STREAM_CACHE_CONTROL = "private, max-age=3600"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # W/ 약한 비교 + 콤마로 나열된 여러 태그 허용
+    return any(
+        tag.strip().removeprefix("W/") == etag.removeprefix("W/")
+        for tag in if_none_match.split(",")
+    )
+
+
+# =============================
+# Thumbnail (ffmpeg 프로세스 없이 in-process 디코딩)
+# =============================
+_THUMB_EXECUTOR = ThreadPoolExecutor(
+    max_workers=THUMB_WORKERS, thread_name_prefix="thumb"
+)
+
+
+def _decode_until(container, offset: float):
+    # offset 이상인 첫 프레임, 없으면 마지막으로 디코딩된 프레임
+    frame = None
+    for frame in container.decode(video=0):
+        if frame.time is not None and frame.time >= offset:
+            break
+    return frame
+
+
+def extract_thumbnail(video_path: str, thumb_path: str) -> None:
+    with av.open(video_path) as container:
+        # seek는 1초 이전 keyframe으로 이동 → 1초까지 앞으로 디코딩
+        # (ffmpeg -ss 00:00:01 -i 와 같은 정확한 위치)
+        container.seek(THUMB_OFFSET_SECONDS * av.time_base)
+        frame = _decode_until(container, THUMB_OFFSET_SECONDS)
+        if frame is None:
+            container.seek(0)
+            frame = _decode_until(container, THUMB_OFFSET_SECONDS)
+        if frame is None:
+            raise ValueError(f"no video frame in {video_path}")
+        frame.to_image().save(thumb_path, "JPEG", quality=85)
+
+
+def preallocate(fd: int, size: int) -> None:
+    if hasattr(os, "posix_fallocate"):
+        os.posix_fallocate(fd, 0, size)
+    else:
+        os.ftruncate(fd, size)
+
+
+def make_scratch_file() -> tuple:
+    fd, path = tempfile.mkstemp(suffix=".mp4", dir=TMP_DIR)
+    # mkstemp는 0600 → replace 후 공개되는 영상은 기존과 같이 0644
+    os.fchmod(fd, 0o644)
+    return fd, path
+
+
+def scan_user_videos(user_id: str) -> dict:
+    video_dir = user_video_dir(user_id)
+
+    if not os.path.exists(video_dir):
+        return {"videos": []}
+
+    # endswith 한 번 + 슬라이스 (".mp4" 4글자, replace는 이름 전체를 다시 스캔)
+    files = [
+        f[:-4]
+        for f in os.listdir(video_dir)
+        if f.endswith(".mp4")
+    ]
+
+    return {"videos": [{"task_id": f} for f in sorted(files, reverse=True)]}
+
 
 # =============================
 # Request Schema
@@ -54,24 +190,24 @@ async def generate_video(
         "callBackUrl": "http://auth.justic.store:8000/api/video/callback",
     }
 
-    headers = {
-        "Authorization": f"Bearer {KIE_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.post(KIE_API_URL, json=payload, headers=headers)
-        resp.raise_for_status()
-        result = resp.json()
+    async with kie_semaphore():
+        resp = await get_http().post(
+            KIE_API_URL, json=payload, headers=kie_headers(), timeout=30
+        )
+    resp.raise_for_status()
+    result = orjson.loads(resp.content)
 
     task_id = result.get("data", {}).get("taskId")
     if not task_id:
         raise HTTPException(status_code=502, detail="Invalid response")
 
-    TASKS[task_id] = {
-        "status": "QUEUED",
-        "user_id": user_id,
-    }
+    # 작업 상태는 Redis에 저장 (콜백이 다른 워커로 들어와도 조회 가능)
+    # HSET + EXPIRE를 MULTI/EXEC 한 번에 전송 → 1 RTT, TTL 없는 키가 남지 않음
+    key = task_key(task_id)
+    async with get_redis().pipeline() as pipe:
+        pipe.hset(key, mapping={"status": "QUEUED", "user_id": user_id})
+        pipe.expire(key, settings.task_ttl_seconds)
+        await pipe.execute()
 
     return {"task_id": task_id, "status": "QUEUED"}
 
@@ -85,33 +221,65 @@ async def video_callback(payload: dict):
     data = payload.get("data", {})
     task_id = data.get("taskId")
 
-    task = TASKS.get(task_id)
+    if not task_id:
+        return {"code": 200}
+
+    r = get_redis()
+    key = task_key(task_id)
+    task = await r.hgetall(key)
     if not task:
         return {"code": 200}
 
+    # 재전송된 콜백: 이미 받은 영상을 다시 내려받지 않음
+    if task.get("status") == "DONE":
+        return {"code": 200}
+
     if code != 200:
-        task["status"] = "FAILED"
+        await r.hset(key, "status", "FAILED")
         return {"code": 200}
 
     urls = data.get("info", {}).get("resultUrls", [])
     if not urls:
-        task["status"] = "FAILED"
+        await r.hset(key, "status", "FAILED")
         return {"code": 200}
 
     user_id = task["user_id"]
 
-    user_video_dir = f"{VIDEO_BASE}/{user_id}"
-    os.makedirs(user_video_dir, exist_ok=True)
-
-    video_path = f"{user_video_dir}/{task_id}.mp4"
-
-    async with httpx.AsyncClient(timeout=60) as client:
-        r = await client.get(urls[0])
-        r.raise_for_status()
-        with open(video_path, "wb") as f:
-            f.write(r.content)
-
-    task["status"] = "DONE"
+    await aos.makedirs(user_video_dir(user_id), exist_ok=True)
+    await aos.makedirs(TMP_DIR, exist_ok=True)
+
+    video_path = video_file(user_id, task_id)
+    fd, tmp_video = await run_in_threadpool(make_scratch_file)
+
+    try:
+        # mkstemp가 연 fd를 그대로 사용 (닫기는 aiofiles 컨텍스트가 담당)
+        async with aiofiles.open(fd, "wb") as f:
+            # 전체 영상을 메모리에 올리지 않고 1MB 단위로 디스크에 기록
+            async with get_http().stream("GET", urls[0]) as resp:
+                resp.raise_for_status()
+                size = int(resp.headers.get("Content-Length") or 0)
+                if size >= PREALLOCATE_MIN_BYTES:
+                    await run_in_threadpool(preallocate, f.fileno(), size)
+                async for chunk in resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+            # 실제 기록 길이로 맞춤 (Content-Length와 다를 때 남는 0 바이트 제거)
+            await f.truncate()
+
+        # 다운로드가 끝난 파일만 목록/스트리밍에 노출
+        await aos.replace(tmp_video, video_path)
+    except BaseException:
+        # 성공 시엔 replace로 이미 이동됨 → 정리는 실패 경로에서만
+        with suppress(FileNotFoundError):
+            await aos.remove(tmp_video)
+        raise
+
+    # 상태 갱신 + TTL 해제 + 목록 캐시 무효화를 한 번에
+    # (완료된 영상의 task → user 매핑은 /thumb 가 계속 사용하므로 만료시키지 않음)
+    async with r.pipeline() as pipe:
+        pipe.hset(key, "status", "DONE")
+        pipe.persist(key)
+        pipe.delete(video_list_key(user_id))
+        await pipe.execute()
 
     return {"code": 200}
 
@@ -120,28 +288,28 @@ async def video_callback(payload: dict):
 # 3. 내 영상 목록 조회 (JWT 필요)
 # ======================================================
 @router.get("/list")
-def list_videos(user=Depends(verify_jwt)):
+async def list_videos(user=Depends(verify_jwt)):
     user_id = user["sub"]
-    user_video_dir = f"{VIDEO_BASE}/{user_id}"
-
-    if not os.path.exists(user_video_dir):
-        return {"videos": []}
+    r = get_redis()
+    key = video_list_key(user_id)
 
-    files = [
-        f.replace(".mp4", "")
-        for f in os.listdir(user_video_dir)
-        if f.endswith(".mp4")
-    ]
+    # 캐시 hit: 저장된 JSON을 그대로 반환 (decode / encode 생략)
+    cached = await r.get(key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
 
-    return {"videos": [{"task_id": f} for f in sorted(files, reverse=True)]}
+    # listdir/stat은 threadpool에서 (이벤트 루프 차단 방지)
+    result = await run_in_threadpool(scan_user_videos, user_id)
+    await r.set(key, orjson.dumps(result), ex=LIST_CACHE_TTL_SECONDS)
+    return result
 
 
 # ======================================================
 # 4. 상태 조회 (JWT 필요)
 # ======================================================
 @router.get("/status/{task_id}")
-def get_status(task_id: str, user=Depends(verify_jwt)):
-    task = TASKS.get(task_id)
+async def get_status(task_id: str, user=Depends(verify_jwt)):
+    task = await get_redis().hgetall(task_key(task_id))
     if not task or task["user_id"] != user["sub"]:
         raise HTTPException(status_code=404)
 
@@ -152,51 +320,59 @@ def get_status(task_id: str, user=Depends(verify_jwt)):
 # 5. 영상 스트리밍 (JWT 필요)
 # ======================================================
 @router.get("/stream/{task_id}")
-def stream_video(task_id: str, user=Depends(verify_jwt)):
+def stream_video(task_id: str, request: Request, user=Depends(verify_jwt)):
     user_id = user["sub"]
-    path = f"{VIDEO_BASE}/{user_id}/{task_id}.mp4"
+    path = video_file(user_id, task_id)
 
-    if not os.path.exists(path):
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404)
 
-    return FileResponse(path, media_type="video/mp4")
+    # Starlette FileResponse가 Range 요청을 처리 (206 Partial Content)
+    response = VideoFileResponse(
+        path,
+        media_type="video/mp4",
+        stat_result=stat_result,
+        headers={"Cache-Control": STREAM_CACHE_CONTROL},
+    )
+
+    # 새로고침 시 같은 영상이면 본문 없이 304
+    if_none_match = request.headers.get("if-none-match")
+    etag = response.headers["etag"]
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": STREAM_CACHE_CONTROL},
+        )
+
+    return response
 
 
 # ======================================================
 # 6. 썸네일 이미지 제공 (인증 ❌ 공개)
 # ======================================================
 @router.get("/thumb/{task_id}.jpg")
-def get_thumbnail(task_id: str):
+async def get_thumbnail(task_id: str):
     # task_id → 어떤 유저인지 찾기
-    task = TASKS.get(task_id)
+    task = await get_redis().hgetall(task_key(task_id))
     if not task:
         raise HTTPException(status_code=404)
 
     user_id = task["user_id"]
 
-    video_path = f"{VIDEO_BASE}/{user_id}/{task_id}.mp4"
-    thumb_dir = f"{THUMB_BASE}/{user_id}"
-    thumb_path = f"{thumb_dir}/{task_id}.jpg"
+    video_path = video_file(user_id, task_id)
+    thumb_path = thumb_file(user_id, task_id)
 
-    if not os.path.exists(video_path):
+    if not await aos.path.exists(video_path):
         raise HTTPException(status_code=404)
 
-    os.makedirs(thumb_dir, exist_ok=True)
-
-    if not os.path.exists(thumb_path):
-        subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-ss", "00:00:01",
-                "-i", video_path,
-                "-frames:v", "1",
-                "-q:v", "2",
-                thumb_path,
-            ],
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+    await aos.makedirs(user_thumb_dir(user_id), exist_ok=True)
+
+    if not await aos.path.exists(thumb_path):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            _THUMB_EXECUTOR, extract_thumbnail, video_path, thumb_path
         )
 
     return FileResponse(thumb_path, media_type="image/jpeg")